@@ -41,29 +41,22 @@ class Communication(BaseCommunication):
 	def update_lead_email_tracker_on_reply(self):
 		"""Update Lead Email Tracker status when a reply is received"""
 		try:
-			# Find the most recent tracker for this lead that's still active
-			tracker = frappe.db.get_value(
-				"Lead Email Tracker",
-				{
-					"lead": self.reference_name,
-					"status": ["in", ["Sent", "Opened", "Queued", "Delivered"]]
-				},
-				["name"],
-				order_by="last_sent_on desc"
+			# Mark the most recent active tracker for this lead as replied in a single statement
+			frappe.db.sql(
+				"""
+				UPDATE `tabLead Email Tracker`
+				SET status = 'Replied'
+				WHERE lead = %s
+				AND status IN ('Sent', 'Opened', 'Queued', 'Delivered')
+				ORDER BY last_sent_on DESC
+				LIMIT 1
+				""",
+				(self.reference_name,),
 			)
-			
-			if tracker:
-				frappe.db.set_value(
-					"Lead Email Tracker",
-					tracker,
-					{
-						"status": "Replied",
-						"last_opened_on": frappe.utils.now_datetime()
-					},
-					update_modified=False
-				)
+
+			if frappe.db._cursor.rowcount:
 				frappe.logger().info(
-					f"[Reply Tracking] Updated tracker {tracker} status to 'Replied' for lead {self.reference_name}"
+					f"[Reply Tracking] Updated tracker status to 'Replied' for lead {self.reference_name}"
 				)
 				
 				# Publish real-time update
@@ -71,7 +64,6 @@ class Communication(BaseCommunication):
 					"lead_email_reply",
 					{
 						"lead": self.reference_name,
-						"tracker": tracker,
 						"communication": self.name
 					},
 					after_commit=True
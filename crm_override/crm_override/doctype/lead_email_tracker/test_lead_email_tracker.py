@@ -1,9 +1,14 @@
 # Copyright (c) 2025, Neha and Contributors
 # See license.txt
 
-# import frappe
+from unittest.mock import patch
+
+import frappe
+import orjson
 from frappe.tests import IntegrationTestCase
 
+from crm_override.crm_override import email_tracker
+from crm_override.crm_override.email_tracker import PENDING_OPENS_KEY, process_pending_opens, sendgrid_webhook
 
 # On IntegrationTestCase, the doctype test records and all
 # link-field test record dependencies are recursively loaded
@@ -19,4 +24,80 @@ class IntegrationTestLeadEmailTracker(IntegrationTestCase):
 	Use this class for testing interactions between multiple components.
 	"""
 
-	pass
+	def setUp(self):
+		frappe.cache().delete_value(PENDING_OPENS_KEY)
+		self.trackers = []
+
+	def tearDown(self):
+		# The webhook and process_pending_opens commit, so clean up explicitly
+		frappe.cache().delete_value(PENDING_OPENS_KEY)
+		if self.trackers:
+			frappe.db.delete("Lead Email Tracker", {"name": ("in", self.trackers)})
+			frappe.db.commit()
+
+	def _make_tracker(self, status="Queued"):
+		tracker = frappe.get_doc({
+			"doctype": "Lead Email Tracker",
+			"email": "tracker@example.com",
+			"status": status
+		}).insert(ignore_permissions=True)
+		self.trackers.append(tracker.name)
+		return tracker
+
+	def _post_webhook(self, events):
+		"""Run sendgrid_webhook against a batch of SendGrid events"""
+		request = getattr(frappe.local, "request", None)
+		frappe.local.request = frappe._dict(method="POST", data=orjson.dumps(events))
+		try:
+			return sendgrid_webhook()
+		finally:
+			frappe.local.request = request
+
+	def test_webhook_last_transition_wins(self):
+		"""A deferred event followed by an open in one batch leaves the tracker Opened"""
+		tracker = self._make_tracker()
+
+		result = self._post_webhook([
+			{"event": "deferred", "reason": "Mailbox busy", "tracker_name": tracker.name},
+			{"event": "open", "tracker_name": tracker.name}
+		])
+
+		self.assertEqual(result["status"], "success")
+		self.assertEqual(frappe.db.get_value("Lead Email Tracker", tracker.name, "status"), "Opened")
+
+	def test_webhook_failed_error_messages(self):
+		"""Each failed tracker keeps its own event's reason"""
+		bounced = self._make_tracker()
+		dropped = self._make_tracker()
+
+		self._post_webhook([
+			{"event": "bounce", "reason": "Mailbox does not exist", "tracker_name": bounced.name},
+			{"event": "dropped", "reason": "Spam content", "tracker_name": dropped.name}
+		])
+
+		for name, reason in ((bounced.name, "Mailbox does not exist"), (dropped.name, "Spam content")):
+			status, error_message = frappe.db.get_value(
+				"Lead Email Tracker", name, ["status", "error_message"]
+			)
+			self.assertEqual(status, "Failed")
+			self.assertEqual(error_message, reason)
+
+	def test_pending_opens_kept_on_write_failure(self):
+		"""Buffered opens stay queued when applying them fails, and are applied on the next run"""
+		tracker = self._make_tracker(status="Sent")
+		frappe.db.set_value("Lead Email Tracker", tracker.name, "email_queue_status", "_Test Email Queue")
+
+		cache = frappe.cache()
+		cache.rpush(PENDING_OPENS_KEY, orjson.dumps({"eq": "_Test Email Queue", "t": "2025-01-01 10:00:00"}))
+
+		with patch.object(email_tracker, "_apply_pending_opens", side_effect=frappe.db.OperationalError):
+			with self.assertRaises(frappe.db.OperationalError):
+				process_pending_opens()
+
+		self.assertEqual(len(cache.lrange(PENDING_OPENS_KEY, 0, -1)), 1)
+		self.assertEqual(frappe.db.get_value("Lead Email Tracker", tracker.name, "status"), "Sent")
+
+		process_pending_opens()
+
+		self.assertFalse(cache.lrange(PENDING_OPENS_KEY, 0, -1))
+		self.assertEqual(frappe.db.get_value("Lead Email Tracker", tracker.name, "status"), "Opened")
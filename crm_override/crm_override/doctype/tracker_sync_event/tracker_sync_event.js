@@ -0,0 +1,8 @@
+// Copyright (c) 2026, Neha and contributors
+// For license information, please see license.txt
+
+// frappe.ui.form.on("Tracker Sync Event", {
+// 	refresh(frm) {
+
+// 	},
+// });
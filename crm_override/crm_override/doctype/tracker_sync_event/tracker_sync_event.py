@@ -0,0 +1,14 @@
+# Copyright (c) 2026, Neha and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+from frappe.query_builder import Interval
+from frappe.query_builder.functions import Now
+
+
+class TrackerSyncEvent(Document):
+	@staticmethod
+	def clear_old_logs(days=7):
+		table = frappe.qb.DocType("Tracker Sync Event")
+		frappe.db.delete(table, filters=(table.modified < (Now() - Interval(days=days))))
@@ -4,15 +4,18 @@ import re
 import quopri
 from urllib.parse import quote
 
+from crm_override.crm_override.broadcast_utils import create_lead_email_tracker
+from crm_override.crm_override.email_utils import get_communication_summary
+
 def on_email_queue_after_insert(doc, method):
     """
     Hook that runs after Email Queue is inserted.
     Only creates trackers for UI/manual emails, NOT for campaign emails.
     """
 
-    # Handle only CRM Lead-related emails
-    if doc.reference_doctype != "CRM Lead":
-        frappe.logger().info(f"[Hook] Skipping non-CRM Lead email: {doc.name}")
+    # Handle only CRM Lead-related emails; cheap checks first so non-CRM traffic exits early
+    reference_doctype = getattr(doc, "reference_doctype", None)
+    if reference_doctype != "CRM Lead" or not doc.reference_name or frappe.flags.skip_crm_tracker:
         return
 
     # --- Skip if tracker already exists (avoids duplicates for campaign emails)
@@ -30,8 +33,6 @@ def on_email_queue_after_insert(doc, method):
             return
 
     try:
-        from crm_override.crm_override.broadcast_utils import create_lead_email_tracker
-
         frappe.logger().info(f"[Hook] Creating tracker for UI email: {doc.name}")
 
         # Create tracker for UI/manual email
@@ -79,7 +80,7 @@ def on_email_queue_after_insert(doc, method):
                     frappe.publish_realtime(
                         "docinfo_update",
                         {
-                            "doc": comm.as_dict(),
+                            "doc": get_communication_summary(comm),
                             "key": "communications",
                             "action": "update"
                         },
@@ -114,9 +115,14 @@ def on_email_queue_after_insert(doc, method):
 def on_email_queue_before_save(doc, method):
     """Called before Email Queue is saved - catches ALL updates"""
     try:
-        # Store the old status before it changes
+        # Store the old status before it changes; Frappe keeps the pre-save copy in memory,
+        # only fall back to the DB if it wasn't loaded
         if not doc.is_new():
-            old_status = frappe.db.get_value("Email Queue", doc.name, "status")
+            doc_before_save = doc.get_doc_before_save()
+            if doc_before_save:
+                old_status = doc_before_save.status
+            else:
+                old_status = frappe.db.get_value("Email Queue", doc.name, "status")
             if old_status and old_status != doc.status:
                 doc._status_changed = True
                 doc._old_status = old_status
@@ -1,61 +1,85 @@
+from collections import defaultdict
+from urllib.parse import quote
+
 import frappe
+import orjson
+import requests
 from frappe.utils import now_datetime
+from frappe.utils.password import get_decrypted_password
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from crm_override.crm_override.email_utils import COMMUNICATION_SUMMARY_COLUMNS, publish_communication_status
+
+# Message ids per SendGrid Email Activity query, keeps the request URL well under server limits
+SENDGRID_QUERY_CHUNK_SIZE = 100
+
+# Seconds before a SendGrid API call is abandoned
+SENDGRID_TIMEOUT = 5
+
+# Cache key and lifetime (seconds) of the decrypted SendGrid API key
+SENDGRID_API_KEY_CACHE_KEY = "crm_override:sendgrid_api_key"
+SENDGRID_API_KEY_TTL = 600
+
+# Bytes of a webhook body kept in Error Log entries
+WEBHOOK_LOG_MAX_BYTES = 4096
+
+# Pooled SendGrid API session reused across sync runs in the same worker, retrying throttled/transient errors
+_SG_SESSION = requests.Session()
+_SG_SESSION.mount("https://", HTTPAdapter(
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 502, 503, 504])
+))
+
+# Redis list buffering pixel hits until process_pending_opens applies them in bulk
+PENDING_OPENS_KEY = "crm_override:email_opens_pending"
+PENDING_OPENS_BATCH_SIZE = 5000
+
+# Seconds during which repeat pixel hits for the same Email Queue are ignored
+OPENED_ONCE_TTL = 900
+
+# 1x1 transparent GIF served by the tracking pixel endpoint
+TRACKING_GIF = b"GIF89a\x01\x00\x01\x00\x80\x00\x00\xff\xff\xff\x00\x00\x00!\xf9\x04\x01\x00\x00\x00\x00,\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;"
+
+# Response fields for the tracking pixel, built once per process
+_PIXEL_RESPONSE = {
+    "type": "binary",
+    "filename": "pixel.gif",
+    "display_content_as": "inline",
+    "filecontent": TRACKING_GIF,
+}
+
+def _get_trackers_with_communication(email_queue_name):
+    """Fetch an Email Queue's trackers that have a Communication, with its summary fields, in one query."""
+    return frappe.db.sql(f"""
+        SELECT
+            t.name, t.status, t.communication,
+            {COMMUNICATION_SUMMARY_COLUMNS}
+        FROM `tabLead Email Tracker` t
+        INNER JOIN `tabCommunication` c ON c.name = t.communication
+        WHERE t.email_queue_status=%s
+    """, (email_queue_name,), as_dict=True)
+
 
 def update_tracker_on_email_send(email_queue_name):
     """Update tracker + communication when Email Queue moves to Sent."""
-    print("update_tracker_on_email_send called")
     try:
-        tracker = frappe.db.get_value(
-            "Lead Email Tracker",
-            {"email_queue_status": email_queue_name},
-            ["name", "communication"],
-            as_dict=True,
-        )
+        # Tracker and linked Communication are written by one multi-table UPDATE keyed on email_queue_status
+        now = now_datetime()
+        frappe.db.sql("""
+            UPDATE `tabLead Email Tracker` t
+            LEFT JOIN `tabCommunication` c ON c.name = t.communication
+            SET
+                t.status=%s, t.last_sent_on=%s, t.modified=%s,
+                c.status=%s, c.delivery_status=%s, c.modified=%s
+            WHERE t.email_queue_status=%s AND t.status<>%s
+        """, ("Sent", now, now, "Sent", "Sent", now, email_queue_name, "Sent"))
 
-        if tracker:
-            frappe.db.sql("""
-                UPDATE `tabLead Email Tracker`
-                SET status=%s, last_sent_on=%s, modified=%s
-                WHERE name=%s
-            """, ("Sent", now_datetime(), now_datetime(), tracker.name))
-
-            if tracker.communication:
-                # Get the Communication document
-                comm = frappe.get_doc("Communication", tracker.communication)
-                
-                # Use db_set instead of raw SQL
-                comm.db_set("status", "Sent")
-                comm.db_set("delivery_status", "Sent")
-                print(f"Updated Communication {comm.name} status to Sent")
-                print(comm.as_dict())
-                # Trigger notify_change for timeline updates
-                comm.notify_change("update")
-                
-                # Publish realtime event
-                frappe.publish_realtime(
-                    "list_update",
-                    {
-                        "doctype": "Communication",
-                        "name": tracker.communication,
-                        "delivery_status" : "Sent"
-                    },
-                    after_commit=True
-                )
-                if comm.reference_doctype and comm.reference_name:
-                        print("timeline update")
-                        frappe.publish_realtime(
-                            "docinfo_update",
-                            {
-                                "doc": comm.as_dict(),
-                                "key": "communications",
-                                "action": "update"
-                            },
-                            doctype=comm.reference_doctype,
-                            docname=comm.reference_name,
-                            after_commit=True
-                        )
-
-            frappe.db.commit()
+        # Only read the trackers back when the UPDATE changed a row
+        if frappe.db._cursor.rowcount:
+            for tracker in _get_trackers_with_communication(email_queue_name):
+                frappe.logger().debug(f"[Tracker] Updated Communication {tracker.communication} status to Sent")
+                publish_communication_status(tracker, "Sent")
 
     except Exception as e:
         frappe.log_error(
@@ -67,44 +91,22 @@ def update_tracker_on_email_send(email_queue_name):
 def update_tracker_on_email_error(email_queue_name, error_message):
     """Update tracker + communication when Email Queue enters Error/Expired/Cancelled."""
     try:
-        tracker = frappe.db.get_value(
-            "Lead Email Tracker",
-            {"email_queue_status": email_queue_name},
-            ["name", "communication"],
-            as_dict=True,
-        )
+        # Tracker and linked Communication are written by one multi-table UPDATE keyed on email_queue_status
+        now = now_datetime()
+        frappe.db.sql("""
+            UPDATE `tabLead Email Tracker` t
+            LEFT JOIN `tabCommunication` c ON c.name = t.communication
+            SET
+                t.status=%s, t.error_message=%s, t.last_sent_on=%s, t.modified=%s,
+                c.status=%s, c.delivery_status=%s, c.modified=%s
+            WHERE t.email_queue_status=%s AND t.status<>%s
+        """, ("Failed", error_message, now, now, "Failed", "Failed", now, email_queue_name, "Failed"))
 
-        if tracker:
-            frappe.db.sql("""
-                UPDATE `tabLead Email Tracker`
-                SET status=%s, error_message=%s, last_sent_on=%s, modified=%s
-                WHERE name=%s
-            """, ("Failed", error_message, now_datetime(), now_datetime(), tracker.name))
-
-            if tracker.communication:
-                # Get the Communication document
-                comm = frappe.get_doc("Communication", tracker.communication)
-                
-                # Use db_set instead of raw SQL
-                comm.db_set("status", "Failed")
-                comm.db_set("delivery_status", "Failed")
-                print(f"Updated Communication {comm.name} status to Failed")
-                print(comm.as_dict())
-                # Trigger notify_change for timeline updates
-                comm.notify_change("update")
-                
-                # Publish realtime event
-                frappe.publish_realtime(
-                    "list_update",
-                    {
-                        "doctype": "Communication",
-                        "name": tracker.communication,
-                        "delivery_status" : "Failed"
-                    },
-                    after_commit=True
-                )
-
-            frappe.db.commit()
+        # Only read the trackers back when the UPDATE changed a row
+        if frappe.db._cursor.rowcount:
+            for tracker in _get_trackers_with_communication(email_queue_name):
+                frappe.logger().debug(f"[Tracker] Updated Communication {tracker.communication} status to Failed")
+                publish_communication_status(tracker, "Failed")
 
     except Exception as e:
         frappe.log_error(
@@ -113,6 +115,86 @@ def update_tracker_on_email_error(email_queue_name, error_message):
         )
 
 
+@frappe.whitelist(allow_guest=True)
+def email_tracker(name=None):
+    """
+    Tracking pixel endpoint (overrides frappe.email.queue.email_tracker).
+    Returns the pixel straight away; the hit is buffered in Redis and applied by process_pending_opens.
+    """
+    if name:
+        # Mail clients refetch the pixel repeatedly; only the first hit per window is buffered
+        cache = frappe.cache()
+        if cache.set(cache.make_key(f"crm_override:opened_once:{name}"), 1, ex=OPENED_ONCE_TTL, nx=True):
+            cache.rpush(PENDING_OPENS_KEY, orjson.dumps({"eq": name, "t": str(now_datetime())}))
+
+    _respond_gif()
+
+
+def _respond_gif():
+    """Serve the 1x1 tracking GIF as the current response."""
+    frappe.local.response.update(_PIXEL_RESPONSE)
+
+
+def process_pending_opens():
+    """
+    Scheduled job: drain buffered pixel hits and mark their trackers and Communications
+    as Opened with one UPDATE per table.
+    """
+    cache = frappe.cache()
+    entries = cache.lrange(PENDING_OPENS_KEY, 0, PENDING_OPENS_BATCH_SIZE - 1)
+    if not entries:
+        return
+
+    # Keep the earliest hit per Email Queue
+    opened_at_by_eq = {}
+    for entry in entries:
+        hit = orjson.loads(entry)
+        if hit["eq"] not in opened_at_by_eq or hit["t"] < opened_at_by_eq[hit["eq"]]:
+            opened_at_by_eq[hit["eq"]] = hit["t"]
+
+    trackers = frappe.db.sql(f"""
+        SELECT
+            t.name, t.status, t.communication, t.email_queue_status,
+            {COMMUNICATION_SUMMARY_COLUMNS}
+        FROM `tabLead Email Tracker` t
+        LEFT JOIN `tabCommunication` c ON c.name = t.communication
+        WHERE t.email_queue_status IN %s AND t.status<>%s
+    """, (tuple(opened_at_by_eq), "Opened"), as_dict=True)
+    if trackers:
+        _apply_pending_opens(trackers, opened_at_by_eq)
+        frappe.db.commit()
+
+    # Drop the batch only once its writes are committed; on failure it stays queued for the next run
+    cache.ltrim(PENDING_OPENS_KEY, len(entries), -1)
+
+
+def _apply_pending_opens(trackers, opened_at_by_eq):
+    """Mark the given trackers and their Communications as Opened and publish the changes."""
+    now = now_datetime()
+    opened_at_cases = []
+    for tracker in trackers:
+        opened_at_cases.extend((tracker.name, opened_at_by_eq[tracker.email_queue_status]))
+
+    frappe.db.sql("""
+        UPDATE `tabLead Email Tracker`
+        SET status=%s, opened_at=CASE name {} END, modified=%s
+        WHERE name IN %s AND status<>%s
+    """.format(" ".join(["WHEN %s THEN %s"] * len(trackers))),
+        ("Opened", *opened_at_cases, now, tuple(t.name for t in trackers), "Opened"))
+
+    communications = tuple(t.communication for t in trackers if t.communication)
+    if communications:
+        frappe.db.sql("""
+            UPDATE `tabCommunication`
+            SET status=%s, delivery_status=%s, modified=%s
+            WHERE name IN %s
+        """, ("Opened", "Opened", now, communications))
+
+    for tracker in trackers:
+        if tracker.communication:
+            publish_communication_status(tracker, "Opened")
+
+
 @frappe.whitelist(allow_guest=True, methods=['GET', 'POST'])
 def test_webhook():
     """
@@ -127,12 +209,12 @@ def test_webhook():
             "timestamp": str(now_datetime())
         }
     else:
-        import json
         try:
-            data = frappe.request.data
+            raw = frappe.request.data
+            events = orjson.loads(raw)
             frappe.log_error(
                 title="SendGrid Webhook Test - Data Received",
-                message=f"Raw data:\n{data}\n\nParsed:\n{json.dumps(json.loads(data), indent=2)}"
+                message=f"Parsed {len(events)} events\n\nRaw data:\n{raw[:WEBHOOK_LOG_MAX_BYTES].decode(errors='replace')}"
             )
             return {"status": "success", "message": "Data logged"}
         except Exception as e:
@@ -144,21 +226,35 @@ def sendgrid_webhook():
     """
     Receives open/click/delivered events from SendGrid.
     Updates Lead Email Tracker and Communication status.
+    Email Queue and tracker lookups are resolved once for the whole batch, not per event.
     """
+    raw = frappe.request.data
     try:
-        import json
-        
         # Get the events from SendGrid
-        events = json.loads(frappe.request.data)
+        events = orjson.loads(raw)
         
         frappe.logger().info(f"[SendGrid Webhook] Received {len(events)} events")
         
+        # --- Pass 1: collect sg_message_ids for events without custom args and resolve them in one query
+        message_ids = set()
+        for event in events:
+            if not event.get('email_queue_name') and not event.get('tracker_name'):
+                # SendGrid includes sg_message_id in format: <message_id>.<filter_id>
+                sg_message_id = event.get('sg_message_id', '')
+                if sg_message_id:
+                    message_ids.add(sg_message_id.split('.')[0])
+        
+        eq_by_message_id = {}
+        if message_ids:
+            eq_by_message_id = dict(frappe.db.sql("""
+                SELECT message_id, name
+                FROM `tabEmail Queue`
+                WHERE message_id IN %s
+            """, (tuple(message_ids),)))
+        
+        identified_events = []
+        recipients = set()
         for event in events:
-            event_type = event.get('event')  # 'open', 'click', 'delivered', 'bounce', etc.
-            
-            frappe.logger().info(f"[SendGrid Webhook] Event type: {event_type}")
-            frappe.logger().info(f"[SendGrid Webhook] Full event data: {json.dumps(event, indent=2)}")
-            
             # ✅ FIX: Get email_queue_name from custom args (unique_args)
             email_queue_name = None
             tracker_name = None
@@ -171,63 +267,83 @@ def sendgrid_webhook():
             
             # Fallback: try to find by message_id
             if not email_queue_name and not tracker_name:
-                # SendGrid includes sg_message_id in format: <message_id>.<filter_id>
                 sg_message_id = event.get('sg_message_id', '')
                 if sg_message_id:
-                    # Remove the filter part (.filter123)
-                    message_id = sg_message_id.split('.')[0]
-                    
-                    # Try to find Email Queue by message_id
-                    email_queue_name = frappe.db.get_value(
-                        "Email Queue",
-                        {"message_id": message_id},
-                        "name"
-                    )
-                    
+                    email_queue_name = eq_by_message_id.get(sg_message_id.split('.')[0])
                     frappe.logger().info(f"[SendGrid Webhook] Found Email Queue by message_id: {email_queue_name}")
             
-            # Another fallback: find by recipient email + timestamp
+            if not email_queue_name and not tracker_name and event.get('email'):
+                recipients.add(event.get('email'))
+            
+            identified_events.append((event, email_queue_name, tracker_name))
+        
+        # Another fallback: latest recent CRM Lead Email Queue per recipient, for the whole batch in one query.
+        # ROW_NUMBER keeps one row per recipient instead of returning their whole week of mail.
+        latest_eq_by_recipient = {}
+        if recipients:
+            latest_eq_by_recipient = dict(frappe.db.sql("""
+                SELECT recipient, name
+                FROM (
+                    SELECT
+                        eqr.recipient, eq.name,
+                        ROW_NUMBER() OVER (PARTITION BY eqr.recipient ORDER BY eq.creation DESC) AS rn
+                    FROM `tabEmail Queue` eq
+                    INNER JOIN `tabEmail Queue Recipient` eqr ON eqr.parent = eq.name
+                    WHERE eqr.recipient IN %s
+                    AND eq.reference_doctype = 'CRM Lead'
+                    AND eq.creation > DATE_SUB(NOW(), INTERVAL 7 DAY)
+                ) latest
+                WHERE rn = 1
+            """, (tuple(recipients),)))
+        
+        resolved_events = []
+        for event, email_queue_name, tracker_name in identified_events:
             if not email_queue_name and not tracker_name:
-                recipient = event.get('email')
-                timestamp = event.get('timestamp')
-                
-                if recipient:
-                    # Find recent Email Queue for this recipient
-                    email_queue = frappe.db.sql("""
-                        SELECT eq.name
-                        FROM `tabEmail Queue` eq
-                        INNER JOIN `tabEmail Queue Recipient` eqr ON eqr.parent = eq.name
-                        WHERE eqr.recipient = %s
-                        AND eq.reference_doctype = 'CRM Lead'
-                        AND eq.creation > DATE_SUB(NOW(), INTERVAL 7 DAY)
-                        ORDER BY eq.creation DESC
-                        LIMIT 1
-                    """, (recipient,), as_dict=True)
-                    
-                    if email_queue:
-                        email_queue_name = email_queue[0].name
-                        frappe.logger().info(f"[SendGrid Webhook] Found Email Queue by recipient: {email_queue_name}")
+                email_queue_name = latest_eq_by_recipient.get(event.get('email'))
+                if email_queue_name:
+                    frappe.logger().info(f"[SendGrid Webhook] Found Email Queue by recipient: {email_queue_name}")
             
             if not email_queue_name and not tracker_name:
                 frappe.logger().warning(f"[SendGrid Webhook] Could not find Email Queue or Tracker for event: {event}")
                 continue
             
+            resolved_events.append((event, email_queue_name, tracker_name))
+        
+        # --- Pass 2: load every tracker referenced by the batch in one query
+        tracker_names = {tracker_name for _, _, tracker_name in resolved_events if tracker_name}
+        eq_names = {eq_name for _, eq_name, tracker_name in resolved_events if eq_name and not tracker_name}
+        
+        tracker_by_name = {}
+        tracker_by_eq = {}
+        if tracker_names or eq_names:
+            for row in frappe.db.sql(f"""
+                SELECT
+                    t.name, t.status, t.communication, t.email_queue_status,
+                    {COMMUNICATION_SUMMARY_COLUMNS}
+                FROM `tabLead Email Tracker` t
+                LEFT JOIN `tabCommunication` c ON c.name = t.communication
+                WHERE t.name IN %s OR t.email_queue_status IN %s
+            """, (tuple(tracker_names) or ("",), tuple(eq_names) or ("",)), as_dict=True):
+                tracker_by_name[row.name] = row
+                if row.email_queue_status:
+                    tracker_by_eq.setdefault(row.email_queue_status, row)
+        
+        # --- Pass 3: apply each event; only the final state per tracker is staged and flushed in bulk below.
+        # tracker.status is updated in memory so later events in the batch see earlier transitions.
+        now = now_datetime()
+        # Final (status, error_message) per tracker, the last transition in the batch wins
+        staged_trackers = {}
+        # Latest status per Communication, written and published once after the loop
+        comm_updates = {}
+        
+        for event, email_queue_name, tracker_name in resolved_events:
+            event_type = event.get('event')  # 'open', 'click', 'delivered', 'bounce', etc.
+            
+            frappe.logger().info(f"[SendGrid Webhook] Event type: {event_type}")
             frappe.logger().info(f"[SendGrid Webhook] Processing {event_type} for Email Queue: {email_queue_name}")
             
             # Find the tracker
-            tracker = None
-            if tracker_name:
-                tracker = frappe.get_doc("Lead Email Tracker", tracker_name)
-            elif email_queue_name:
-                tracker_data = frappe.db.get_value(
-                    "Lead Email Tracker",
-                    {"email_queue_status": email_queue_name},
-                    ["name", "status", "communication"],
-                    as_dict=True
-                )
-                if tracker_data:
-                    tracker = frappe.get_doc("Lead Email Tracker", tracker_data.name)
-            
+            tracker = tracker_by_name.get(tracker_name) if tracker_name else tracker_by_eq.get(email_queue_name)
             if not tracker:
                 frappe.logger().warning(f"[SendGrid Webhook] No tracker found for Email Queue: {email_queue_name}")
                 continue
@@ -235,88 +351,74 @@ def sendgrid_webhook():
             # ✅ Update based on event type
             if event_type == 'open':
                 if tracker.status != "Opened":
-                    # Update tracker
                     tracker.status = "Opened"
-                    tracker.opened_at = now_datetime()
-                    tracker.save(ignore_permissions=True)
+                    staged_trackers[tracker.name] = ("Opened", None)
                     
                     # Update Communication
                     if tracker.communication:
-                        comm = frappe.get_doc("Communication", tracker.communication)
-                        comm.db_set("status", "Opened", update_modified=False)
-                        comm.db_set("delivery_status", "Opened", update_modified=False)
-                        
-                        # Notify UI
-                        comm.notify_change("update")
-                        frappe.publish_realtime(
-                            "list_update",
-                            {
-                                "doctype": "Communication",
-                                "name": tracker.communication,
-                                "delivery_status": "Opened"
-                            },
-                            after_commit=True
-                        )
-                        
-                        # Update timeline
-                        if comm.reference_doctype and comm.reference_name:
-                            frappe.publish_realtime(
-                                "docinfo_update",
-                                {
-                                    "doc": comm.as_dict(),
-                                    "key": "communications",
-                                    "action": "update"
-                                },
-                                doctype=comm.reference_doctype,
-                                docname=comm.reference_name,
-                                after_commit=True
-                            )
+                        comm_updates[tracker.communication] = (tracker, "Opened")
                     
                     frappe.logger().info(f"[SendGrid Webhook] Updated tracker {tracker.name} -> Opened")
             
             elif event_type == 'delivered':
                 if tracker.status == "Queued":
                     tracker.status = "Sent"
-                    tracker.last_sent_on = now_datetime()
-                    tracker.save(ignore_permissions=True)
+                    staged_trackers[tracker.name] = ("Sent", None)
                     
                     if tracker.communication:
-                        comm = frappe.get_doc("Communication", tracker.communication)
-                        comm.db_set("status", "Sent", update_modified=False)
-                        comm.db_set("delivery_status", "Sent", update_modified=False)
-                        comm.notify_change("update")
-                        
-                        frappe.publish_realtime(
-                            "list_update",
-                            {
-                                "doctype": "Communication",
-                                "name": tracker.communication,
-                                "delivery_status": "Sent"
-                            },
-                            after_commit=True
-                        )
+                        comm_updates[tracker.communication] = (tracker, "Sent")
             
             elif event_type in ['bounce', 'dropped', 'deferred']:
                 error_msg = event.get('reason', event.get('type', 'Unknown error'))
                 tracker.status = "Failed"
-                tracker.error_message = error_msg
-                tracker.save(ignore_permissions=True)
+                staged_trackers[tracker.name] = ("Failed", error_msg)
                 
                 if tracker.communication:
-                    comm = frappe.get_doc("Communication", tracker.communication)
-                    comm.db_set("status", "Failed", update_modified=False)
-                    comm.db_set("delivery_status", "Failed", update_modified=False)
-                    comm.notify_change("update")
-                    
-                    frappe.publish_realtime(
-                        "list_update",
-                        {
-                            "doctype": "Communication",
-                            "name": tracker.communication,
-                            "delivery_status": "Failed"
-                        },
-                        after_commit=True
-                    )
+                    comm_updates[tracker.communication] = (tracker, "Failed")
+        
+        # Flush staged tracker writes grouped by each tracker's final status
+        trackers_by_status = defaultdict(dict)
+        for name, (status, error_msg) in staged_trackers.items():
+            trackers_by_status[status][name] = error_msg
+        
+        if trackers_by_status["Sent"]:
+            frappe.db.sql("""
+                UPDATE `tabLead Email Tracker`
+                SET status=%s, last_sent_on=%s, modified=%s
+                WHERE name IN %s
+            """, ("Sent", now, now, tuple(trackers_by_status["Sent"])))
+        
+        if trackers_by_status["Opened"]:
+            frappe.db.sql("""
+                UPDATE `tabLead Email Tracker`
+                SET status=%s, opened_at=%s, modified=%s
+                WHERE name IN %s
+            """, ("Opened", now, now, tuple(trackers_by_status["Opened"])))
+        
+        failed_trackers = trackers_by_status["Failed"]
+        if failed_trackers:
+            error_cases = [value for item in failed_trackers.items() for value in item]
+            frappe.db.sql("""
+                UPDATE `tabLead Email Tracker`
+                SET status=%s, error_message=CASE name {} END, modified=%s
+                WHERE name IN %s
+            """.format(" ".join(["WHEN %s THEN %s"] * len(failed_trackers))),
+                ("Failed", *error_cases, now, tuple(failed_trackers)))
+        
+        # Communications follow the same final status as their tracker, one UPDATE per status
+        comms_by_status = defaultdict(list)
+        for comm_name, (_tracker, status) in comm_updates.items():
+            comms_by_status[status].append(comm_name)
+        
+        for status, comm_names in comms_by_status.items():
+            frappe.db.sql("""
+                UPDATE `tabCommunication`
+                SET status=%s, delivery_status=%s, modified=%s
+                WHERE name IN %s
+            """, (status, status, now, tuple(comm_names)))
+        
+        for tracker, status in comm_updates.values():
+            publish_communication_status(tracker, status)
         
         frappe.db.commit()
         
@@ -327,23 +429,40 @@ def sendgrid_webhook():
     except Exception as e:
         frappe.log_error(
             title="SendGrid Webhook Error",
-            message=f"Error: {str(e)}\n{frappe.get_traceback()}\nRequest data: {frappe.request.data}"
+            message=f"Error: {str(e)}\n{frappe.get_traceback()}\nRequest data: {raw[:WEBHOOK_LOG_MAX_BYTES].decode(errors='replace')}"
         )
         frappe.response.http_status_code = 500
         return {"status": "error", "message": str(e)}
     
 
 
+def _get_sendgrid_api_key():
+    """Return the default outgoing Email Account's decrypted password, cached in Redis."""
+    cache = frappe.cache()
+    api_key = cache.get_value(SENDGRID_API_KEY_CACHE_KEY)
+    if api_key is None:
+        api_key = ""
+        account = frappe.db.get_value("Email Account", {"default_outgoing": 1}, "name")
+        if account:
+            api_key = get_decrypted_password("Email Account", account, "password", raise_exception=False) or ""
+        cache.set_value(SENDGRID_API_KEY_CACHE_KEY, api_key, expires_in_sec=SENDGRID_API_KEY_TTL)
+    return api_key
+
+
+def clear_sendgrid_api_key_cache(doc, method=None):
+    """Email Account on_update hook: drop the cached SendGrid API key."""
+    frappe.cache().delete_value(SENDGRID_API_KEY_CACHE_KEY)
+
+
 @frappe.whitelist()
 def sync_opens_from_sendgrid():
     """
     Manually sync opens from SendGrid API.
     Can be run as a scheduled job every 5 minutes.
     """
-    import requests
-    
-    # Get API key from Email Account
-    api_key = frappe.db.get_value("Email Account", {"default_outgoing": 1}, "password")
+    api_key = _get_sendgrid_api_key()
+    if not api_key:
+        return "Synced"
     
     # Get recent sent emails (last 24 hours)
     email_queues = frappe.get_all(
@@ -355,41 +474,52 @@ def sync_opens_from_sendgrid():
         fields=["name", "message_id"]
     )
     
-    for eq in email_queues:
-        if not eq.message_id:
-            continue
+    eq_by_message_id = {eq.message_id: eq.name for eq in email_queues if eq.message_id}
+    if not eq_by_message_id:
+        return "Synced"
+    
+    # Query the SendGrid Email Activity API once per chunk of message ids instead of once per email
+    headers = {"Authorization": f"Bearer {api_key}"}
+    message_ids = list(eq_by_message_id)
+    opened_eq_names = set()
+    
+    for i in range(0, len(message_ids), SENDGRID_QUERY_CHUNK_SIZE):
+        chunk = message_ids[i:i + SENDGRID_QUERY_CHUNK_SIZE]
+        query = "msg_id IN ({})".format(", ".join(f'"{message_id}"' for message_id in chunk))
+        url = f"https://api.sendgrid.com/v3/messages?limit=1000&query={quote(query)}"
         
-        # Query SendGrid Stats API
-        url = f"https://api.sendgrid.com/v3/messages/{eq.message_id}"
-        headers = {"Authorization": f"Bearer {api_key}"}
+        # Exhausted retries (e.g. persistent 429s) and timeouts raise; skip the chunk and keep the rest
+        try:
+            response = _SG_SESSION.get(url, headers=headers, timeout=SENDGRID_TIMEOUT)
+        except requests.RequestException as e:
+            frappe.logger().warning(f"[SendGrid Sync] Skipping chunk of {len(chunk)} messages: {e}")
+            continue
+        if not response.ok:
+            continue
         
-        response = requests.get(url, headers=headers)
-        if response.ok:
-            data = response.json()
+        for message in response.json().get("messages", []):
+            if message.get("opens_count", 0) <= 0:
+                continue
             
-            # Check if opened
-            if data.get("opens_count", 0) > 0:
-                # Find tracker
-                tracker = frappe.db.get_value(
-                    "Lead Email Tracker",
-                    {"email_queue_status": eq.name},
-                    ["name", "status", "communication"],
-                    as_dict=True
-                )
-                
-                if tracker and tracker.status != "Opened":
-                    # Update tracker (same logic as webhook)
-                    frappe.db.sql("""
-                        UPDATE `tabLead Email Tracker`
-                        SET status=%s, opened_at=%s
-                        WHERE name=%s
-                    """, ("Opened", now_datetime(), tracker.name))
-                    
-                    if tracker.communication:
-                        comm = frappe.get_doc("Communication", tracker.communication)
-                        comm.db_set("status", "Opened")
-                        comm.db_set("delivery_status", "Opened")
-                        comm.notify_change("update")
+            # SendGrid message ids may carry a ".filter..." suffix
+            msg_id = message.get("msg_id") or ""
+            eq_name = eq_by_message_id.get(msg_id) or eq_by_message_id.get(msg_id.split(".")[0])
+            if eq_name:
+                opened_eq_names.add(eq_name)
+    
+    if not opened_eq_names:
+        return "Synced"
+    
+    # Trackers already Opened are skipped by the WHERE clause, so repeat syncs write nothing
+    now = now_datetime()
+    frappe.db.sql("""
+        UPDATE `tabLead Email Tracker` t
+        LEFT JOIN `tabCommunication` c ON c.name = t.communication
+        SET
+            t.status=%s, t.opened_at=%s, t.modified=%s,
+            c.status=%s, c.delivery_status=%s, c.modified=%s
+        WHERE t.email_queue_status IN %s AND t.status<>%s
+    """, ("Opened", now, now, "Opened", "Opened", now, tuple(opened_eq_names), "Opened"))
     
     frappe.db.commit()
-    return "Synced"
\ No newline at end of file
+    return "Synced"
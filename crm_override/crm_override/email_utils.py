@@ -1,8 +1,82 @@
 import frappe
+from frappe.utils import now_datetime
+
+# Communication fields sent in realtime timeline updates. Bodies (content/text_content)
+# are left out on purpose; the client fetches the full record when it needs it.
+COMMUNICATION_SUMMARY_FIELDS = (
+    "name",
+    "subject",
+    "status",
+    "delivery_status",
+    "thread_id",
+    "sender",
+    "recipients",
+    "creation",
+    "communication_date",
+    "communication_type",
+    "sent_or_received",
+    "reference_doctype",
+    "reference_name",
+)
+
+# The summary fields as `c.`-prefixed SQL columns, for queries that join tabCommunication as `c`.
+# name/status/delivery_status are left to the caller, which usually also selects a tracker's.
+COMMUNICATION_SUMMARY_COLUMNS = ", ".join(
+    f"c.{field}" for field in COMMUNICATION_SUMMARY_FIELDS
+    if field not in ("name", "status", "delivery_status")
+)
+
+
+def get_communication_summary(comm):
+    """Return a slim dict of a Communication for `docinfo_update` realtime payloads"""
+    return {field: comm.get(field) for field in COMMUNICATION_SUMMARY_FIELDS}
+
+
+def publish_communication_status(row, status):
+    """
+    Push a Communication status change to its form, the list view and the lead timeline
+    without loading the doc. `row` carries the Communication's name as `communication` plus the COMMUNICATION_SUMMARY_COLUMNS.
+    """
+    frappe.publish_realtime(
+        "doc_update",
+        {
+            "doctype": "Communication",
+            "name": row.communication,
+            "modified": now_datetime()
+        },
+        doctype="Communication",
+        docname=row.communication,
+        after_commit=True
+    )
+    frappe.publish_realtime(
+        "list_update",
+        {
+            "doctype": "Communication",
+            "name": row.communication,
+            "delivery_status": status
+        },
+        after_commit=True
+    )
+    if row.reference_doctype and row.reference_name:
+        doc = get_communication_summary(row)
+        doc.update(name=row.communication, status=status, delivery_status=status)
+        frappe.publish_realtime(
+            "docinfo_update",
+            {
+                "doc": doc,
+                "key": "communications",
+                "action": "update"
+            },
+            doctype=row.reference_doctype,
+            docname=row.reference_name,
+            after_commit=True
+        )
+
 
 def log_email_in_crm(lead_name, subject, content, sender, recipients):
     """
-    Create a Communication doc to log the email in CRM Lead's email tab
+    Queue a background job that creates a Communication doc to log the email
+    in CRM Lead's email tab, keeping the insert and commit off the request path.
     
     Args:
         lead_name (str): The Lead document name (e.g. CRM-LEAD-2025-00134)
@@ -10,6 +84,23 @@ def log_email_in_crm(lead_name, subject, content, sender, recipients):
         content (str): Email body (HTML)
         sender (str): Sender email address
         recipients (list|str): Single recipient email or list of recipient emails
+    """
+    frappe.enqueue(
+        "crm_override.crm_override.email_utils._log_email_in_crm_worker",
+        queue="short",
+        enqueue_after_commit=True,
+        lead_name=lead_name,
+        subject=subject,
+        content=content,
+        sender=sender,
+        recipients=recipients
+    )
+
+
+def _log_email_in_crm_worker(lead_name, subject, content, sender, recipients):
+    """
+    Background job for log_email_in_crm: create the Communication doc.
+    The job runner commits once the job returns.
     
     Returns:
         Communication: The created communication document
@@ -20,8 +111,10 @@ def log_email_in_crm(lead_name, subject, content, sender, recipients):
             recipients = ", ".join(recipients)
             
         # Get the lead's full name for better display
-        lead = frappe.get_doc("CRM Lead", lead_name)
-        lead_title = f"{lead.first_name or ''} {lead.last_name or ''}".strip() or lead_name
+        first_name, last_name = frappe.db.get_value(
+            "CRM Lead", lead_name, ["first_name", "last_name"]
+        ) or ("", "")
+        lead_title = f"{first_name or ''} {last_name or ''}".strip() or lead_name
             
         comm = frappe.get_doc({
             "doctype": "Communication",
@@ -51,13 +144,86 @@ def log_email_in_crm(lead_name, subject, content, sender, recipients):
         })
         
         comm.insert(ignore_permissions=True)
-        frappe.db.commit()
         
-        print(f"Email logged successfully - Communication ID: {comm.name}")
+        frappe.logger().debug(f"Email logged successfully - Communication ID: {comm.name}")
         return comm
         
     except Exception as e:
         error_msg = f"Failed to log email for lead {lead_name}: {str(e)}"
-        print(error_msg)
         frappe.log_error(error_msg, "Email Logging Error")
-        return None
\ No newline at end of file
+        return None
+
+def log_emails_in_crm(records, commit=False):
+    """
+    Log many emails in their CRM Leads' email tabs with one multi-row INSERT
+    into tabCommunication and one into tabCommunication Link, instead of a doc insert per email.
+    
+    Args:
+        records (list[dict]): Each with lead_name, subject, content, sender and recipients,
+            as accepted by log_email_in_crm
+        commit (bool): Commit once all rows are inserted; otherwise the caller's transaction does
+    
+    Returns:
+        list[str]: Names of the created Communications, in record order
+    """
+    if not records:
+        return []
+    
+    lead_names = list({record["lead_name"] for record in records})
+    lead_titles = {
+        lead.name: f"{lead.first_name or ''} {lead.last_name or ''}".strip() or lead.name
+        for lead in frappe.get_all(
+            "CRM Lead",
+            filters={"name": ["in", lead_names]},
+            fields=["name", "first_name", "last_name"]
+        )
+    }
+    
+    now = now_datetime()
+    user = frappe.session.user
+    fields = [
+        "name", "creation", "modified", "owner", "modified_by", "docstatus",
+        "communication_type", "communication_medium", "status", "subject", "content",
+        "sender", "recipients", "reference_doctype", "reference_name", "sent_or_received",
+        "has_attachment", "email_status", "_liked_by", "seen", "communication_date"
+    ]
+    values = []
+    names = []
+    
+    for record in records:
+        # Names are generated up front so the rows and their links need no read-back
+        name = frappe.generate_hash(length=10)
+        names.append(name)
+        
+        recipients = record["recipients"]
+        if isinstance(recipients, list):
+            recipients = ", ".join(recipients)
+        
+        values.append((
+            name, now, now, user, user, 0,
+            "Communication", "Email", "Linked", record["subject"], record["content"],
+            record["sender"], recipients, "CRM Lead", record["lead_name"], "Sent",
+            0, "Sent", "[]", 0, now
+        ))
+    
+    frappe.db.bulk_insert("Communication", fields, values)
+    
+    # Timeline links for all parents in one multi-row INSERT as well
+    link_fields = [
+        "name", "creation", "modified", "owner", "modified_by", "docstatus",
+        "parent", "parenttype", "parentfield", "idx", "link_doctype", "link_name", "link_title"
+    ]
+    link_values = [
+        (
+            frappe.generate_hash(length=10), now, now, user, user, 0,
+            name, "Communication", "timeline_links", 1, "CRM Lead", record["lead_name"],
+            lead_titles.get(record["lead_name"], record["lead_name"])
+        )
+        for name, record in zip(names, records, strict=True)
+    ]
+    frappe.db.bulk_insert("Communication Link", link_fields, link_values)
+    
+    if commit:
+        frappe.db.commit()
+    
+    return names
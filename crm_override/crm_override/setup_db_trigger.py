@@ -7,6 +7,12 @@ Run this once: bench execute crm_override.crm_override.setup_db_trigger.setup_em
 
 import frappe
 
+TRIGGER_NAME = "update_lead_tracker_on_email_sent"
+
+# Cache key and lifetime (seconds) of the trigger-installed flag
+TRIGGER_INSTALLED_CACHE_KEY = "lead_tracker_trigger_installed"
+TRIGGER_INSTALLED_TTL = 3600
+
 def setup_email_queue_trigger():
     """
     Creates a database trigger that automatically updates Lead Email Tracker
@@ -24,74 +30,51 @@ def setup_email_queue_trigger():
             AFTER UPDATE ON `tabEmail Queue`
             FOR EACH ROW
             BEGIN
-                DECLARE tracker_communication VARCHAR(255);
-                
-                -- When Email Queue changes to "Sent"
-                IF NEW.status = 'Sent' AND OLD.status != 'Sent' THEN
-                    -- Update Lead Email Tracker and get communication
-                    UPDATE `tabLead Email Tracker`
-                    SET 
-                        status = 'Sent',
-                        last_sent_on = NOW(),
-                        modified = NOW()
+                -- When Email Queue changes to "Sent" or to Error/Expired/Cancelled
+                IF (NEW.status = 'Sent' AND OLD.status != 'Sent')
+                   OR (NEW.status IN ('Error', 'Expired', 'Cancelled')
+                       AND OLD.status NOT IN ('Error', 'Expired', 'Cancelled')) THEN
+                    -- Queue the trackers about to change for the sync job's UI updates. Same predicate
+                    -- as the UPDATE below, so trackers already in the target state get no event.
+                    INSERT INTO `tabTracker Sync Event`
+                        (name, tracker, processed, creation, modified, owner, modified_by)
+                    SELECT UUID(), name, 0, NOW(), NOW(), 'Administrator', 'Administrator'
+                    FROM `tabLead Email Tracker`
                     WHERE 
                         email_queue_status = NEW.name
-                        AND status = 'Queued';
+                        AND ((NEW.status = 'Sent' AND status = 'Queued')
+                            OR (NEW.status != 'Sent' AND status != 'Failed'));
                     
-                    -- Get the communication ID
-                    SELECT communication INTO tracker_communication
-                    FROM `tabLead Email Tracker`
-                    WHERE email_queue_status = NEW.name
-                    LIMIT 1;
-                    
-                    -- Update Communication if exists
-                    IF tracker_communication IS NOT NULL THEN
-                        UPDATE `tabCommunication`
-                        SET 
-                            status = 'Sent',
-                            delivery_status = 'Sent',
-                            modified = NOW()
-                        WHERE name = tracker_communication;
-                    END IF;
-                END IF;
-                
-                -- When Email Queue changes to Error/Expired/Cancelled
-                IF NEW.status IN ('Error', 'Expired', 'Cancelled') 
-                   AND OLD.status NOT IN ('Error', 'Expired', 'Cancelled') THEN
-                    -- Update Lead Email Tracker
+                    -- Update Lead Email Tracker for either transition in one statement
                     UPDATE `tabLead Email Tracker`
                     SET 
-                        status = 'Failed',
-                        error_message = COALESCE(NEW.error, CONCAT('Email ', NEW.status)),
+                        status = CASE WHEN NEW.status = 'Sent' THEN 'Sent' ELSE 'Failed' END,
+                        error_message = CASE WHEN NEW.status = 'Sent' THEN error_message
+                            ELSE COALESCE(NEW.error, CONCAT('Email ', NEW.status)) END,
                         last_sent_on = NOW(),
                         modified = NOW()
                     WHERE 
                         email_queue_status = NEW.name
-                        AND status != 'Failed';
+                        AND ((NEW.status = 'Sent' AND status = 'Queued')
+                            OR (NEW.status != 'Sent' AND status != 'Failed'));
                     
-                    -- Get the communication ID
-                    SELECT communication INTO tracker_communication
-                    FROM `tabLead Email Tracker`
-                    WHERE email_queue_status = NEW.name
-                    LIMIT 1;
-                    
-                    -- Update Communication if exists
-                    IF tracker_communication IS NOT NULL THEN
-                        UPDATE `tabCommunication`
-                        SET 
-                            status = 'Failed',
-                            delivery_status = 'Failed',
-                            modified = NOW()
-                        WHERE name = tracker_communication;
-                    END IF;
+                    -- Update the linked Communication, if any, via the tracker in one statement
+                    UPDATE `tabCommunication` c
+                    INNER JOIN `tabLead Email Tracker` t ON c.name = t.communication
+                    SET 
+                        c.status = CASE WHEN NEW.status = 'Sent' THEN 'Sent' ELSE 'Failed' END,
+                        c.delivery_status = CASE WHEN NEW.status = 'Sent' THEN 'Sent' ELSE 'Failed' END,
+                        c.modified = NOW()
+                    WHERE t.email_queue_status = NEW.name;
                 END IF;
             END
         """
         
         frappe.db.sql(trigger_sql)
         frappe.db.commit()
+        frappe.cache().delete_value(TRIGGER_INSTALLED_CACHE_KEY)
         
-        print("✅ Database trigger created successfully with Communication updates!")
+        frappe.logger().info("Database trigger created successfully with Communication updates")
         
         return {
             "success": True,
@@ -100,7 +83,7 @@ def setup_email_queue_trigger():
         
     except Exception as e:
         error_msg = f"Failed to create trigger: {str(e)}"
-        print(f"❌ {error_msg}")
+        frappe.logger().error(error_msg)
         frappe.log_error(
             title="Database Trigger Setup Failed",
             message=f"{error_msg}\n{frappe.get_traceback()}"
@@ -119,8 +102,9 @@ def remove_email_queue_trigger():
             DROP TRIGGER IF EXISTS update_lead_tracker_on_email_sent
         """)
         frappe.db.commit()
+        frappe.cache().delete_value(TRIGGER_INSTALLED_CACHE_KEY)
         
-        print("✅ Database trigger removed successfully!")
+        frappe.logger().info("Database trigger removed successfully")
         
         return {
             "success": True,
@@ -129,7 +113,7 @@ def remove_email_queue_trigger():
         
     except Exception as e:
         error_msg = f"Failed to remove trigger: {str(e)}"
-        print(f"❌ {error_msg}")
+        frappe.logger().error(error_msg)
         return {
             "success": False,
             "message": error_msg
@@ -141,30 +125,42 @@ def check_trigger_status():
     Check if the trigger is installed and working.
     """
     try:
-        triggers = frappe.db.sql("""
-            SHOW TRIGGERS LIKE 'tabEmail Queue'
-        """, as_dict=True)
-        
-        trigger_exists = any(
-            t.get('Trigger') == 'update_lead_tracker_on_email_sent' 
-            for t in triggers
-        )
+        trigger_exists = is_trigger_installed()
         
         if trigger_exists:
-            print("✅ Database trigger is ACTIVE")
-            print("Automatic updates are enabled at database level")
+            frappe.logger().info("Database trigger is ACTIVE, automatic updates are enabled at database level")
         else:
-            print("❌ Database trigger is NOT installed")
-            print("Run: bench execute crm_override.crm_override.setup_db_trigger.setup_email_queue_trigger")
+            frappe.logger().warning(
+                "Database trigger is NOT installed. "
+                "Run: bench execute crm_override.crm_override.setup_db_trigger.setup_email_queue_trigger"
+            )
         
         return {
-            "trigger_exists": trigger_exists,
-            "all_triggers": triggers
+            "trigger_exists": trigger_exists
         }
         
     except Exception as e:
-        print(f"❌ Error checking trigger: {str(e)}")
+        frappe.logger().error(f"Error checking trigger: {str(e)}")
         return {
             "trigger_exists": False,
             "error": str(e)
-        }
\ No newline at end of file
+        }
+
+
+def is_trigger_installed():
+    """
+    Return whether the Email Queue trigger exists, cached in Redis.
+    setup_email_queue_trigger and remove_email_queue_trigger clear the cache.
+    """
+    cache = frappe.cache()
+    installed = cache.get_value(TRIGGER_INSTALLED_CACHE_KEY)
+    if installed is None:
+        installed = bool(frappe.db.sql("""
+            SELECT 1 FROM INFORMATION_SCHEMA.TRIGGERS
+            WHERE TRIGGER_SCHEMA = DATABASE()
+            AND TRIGGER_NAME = %s
+            AND EVENT_OBJECT_TABLE = 'tabEmail Queue'
+            LIMIT 1
+        """, (TRIGGER_NAME,)))
+        cache.set_value(TRIGGER_INSTALLED_CACHE_KEY, installed, expires_in_sec=TRIGGER_INSTALLED_TTL)
+    return installed
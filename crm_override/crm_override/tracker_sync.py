@@ -1,8 +1,22 @@
 import frappe
 from frappe.utils import now_datetime
 
+from crm_override.crm_override.email_utils import COMMUNICATION_SUMMARY_COLUMNS, publish_communication_status
+from crm_override.crm_override.setup_db_trigger import is_trigger_installed
+
 # In tracker_sync.py
 
+# Trigger-written events read and committed per batch; each run drains all of them
+TRACKER_SYNC_EVENT_BATCH_SIZE = 500
+
+# Trackers read and committed per page by the polling scan
+TRACKER_SYNC_CHUNK_SIZE = 500
+
+# Tracker/Email Queue states whose Communication should move to Sent or Failed
+SENT_CONDITION = "eq.status = 'Sent' AND t.status = 'Queued'"
+FAILED_CONDITION = "eq.status IN ('Error', 'Expired', 'Cancelled') AND t.status IN ('Queued', 'Sent')"
+
+
 def sync_email_tracker_status():
     """
     Scheduled job to sync Lead Email Tracker status with Email Queue status.
@@ -11,86 +25,148 @@ def sync_email_tracker_status():
     try:
         frappe.logger().info("[Tracker Sync] Starting sync job")
         
-        # Get all trackers that need Communication UI updates
-        trackers = frappe.db.sql("""
-            SELECT 
-                t.name as tracker_name,
-                t.communication,
-                t.status as tracker_status,
-                eq.status as queue_status,
-                eq.error,
-                c.reference_doctype,
-                c.reference_name
-            FROM `tabLead Email Tracker` t
-            INNER JOIN `tabEmail Queue` eq ON t.email_queue_status = eq.name
-            LEFT JOIN `tabCommunication` c ON t.communication = c.name
-            WHERE t.status IN ('Queued', 'Sent')
-            AND t.communication IS NOT NULL
-        """, as_dict=True)
+        process_tracker_sync_events()
         
-        frappe.logger().info(f"[Tracker Sync] Found {len(trackers)} trackers to check")
+        # The Email Queue trigger already keeps trackers in sync; the scan below is only a fallback
+        if is_trigger_installed() and not frappe.conf.get("force_tracker_sync"):
+            frappe.logger().info("[Tracker Sync] DB trigger active, skipping polling scan")
+            return
         
-        updated_count = 0
+        # Communications that need a status change, handled one keyset page at a time with a commit per page
+        now = now_datetime()
+        comm_count = 0
+        for trackers in _iter_pending_trackers():
+            tracker_names = tuple(t.tracker_name for t in trackers)
+            
+            # One UPDATE ... JOIN per target status instead of two db_set calls per Communication.
+            # Runs before the tracker UPDATEs below, whose writes would clear these conditions.
+            for new_status, condition in (("Sent", SENT_CONDITION), ("Failed", FAILED_CONDITION)):
+                frappe.db.sql(f"""
+                    UPDATE `tabCommunication` c
+                    INNER JOIN `tabLead Email Tracker` t ON t.communication = c.name
+                    INNER JOIN `tabEmail Queue` eq ON t.email_queue_status = eq.name
+                    SET c.status = %s, c.delivery_status = %s, c.modified = %s
+                    WHERE {condition} AND c.status <> %s AND t.name IN %s
+                """, (new_status, new_status, now, new_status, tracker_names))
+            
+            _publish_tracker_updates(trackers)
+            frappe.db.commit()
+            comm_count += len(trackers)
+        
+        frappe.logger().info(f"[Tracker Sync] Updated {comm_count} communications")
+        
+        # Bring the trackers themselves in line with their Email Queue, one statement per status
+        frappe.db.sql(f"""
+            UPDATE `tabLead Email Tracker` t
+            INNER JOIN `tabEmail Queue` eq ON t.email_queue_status = eq.name
+            SET t.status = 'Sent', t.last_sent_on = %s, t.modified = %s
+            WHERE {SENT_CONDITION}
+        """, (now, now))
+        sent_count = frappe.db._cursor.rowcount
         
-        for tracker in trackers:
-            try:
-                new_status = None
-                
-                # Determine if status needs update
-                if tracker.queue_status == "Sent" and tracker.tracker_status == "Queued":
-                    new_status = "Sent"
-                elif tracker.queue_status in ["Error", "Expired", "Cancelled"]:
-                    new_status = "Failed"
-                
-                if new_status and tracker.communication:
-                    # Get Communication document
-                    comm = frappe.get_doc("Communication", tracker.communication)
-                    
-                    # Update Communication
-                    comm.db_set("status", new_status)
-                    comm.db_set("delivery_status", new_status)
-                    
-                    # Trigger UI updates
-                    comm.notify_change("update")
-                    
-                    frappe.publish_realtime(
-                        "list_update",
-                        {
-                            "doctype": "Communication",
-                            "name": tracker.communication,
-                            "delivery_status": new_status
-                        },
-                        after_commit=True
-                    )
-                    
-                    if tracker.reference_doctype and tracker.reference_name:
-                        frappe.publish_realtime(
-                            "docinfo_update",
-                            {
-                                "doc": comm.as_dict(),
-                                "key": "communications",
-                                "action": "update"
-                            },
-                            doctype=tracker.reference_doctype,
-                            docname=tracker.reference_name,
-                            after_commit=True
-                        )
-                    
-                    updated_count += 1
-                    frappe.logger().info(f"[Tracker Sync] Updated Communication {tracker.communication} to {new_status}")
-                    
-            except Exception as e:
-                frappe.logger().error(f"[Tracker Sync] Error processing tracker {tracker.get('tracker_name')}: {str(e)}")
-                continue
+        frappe.db.sql(f"""
+            UPDATE `tabLead Email Tracker` t
+            INNER JOIN `tabEmail Queue` eq ON t.email_queue_status = eq.name
+            SET t.status = 'Failed', t.error_message = COALESCE(eq.error, CONCAT('Email ', eq.status)),
+                t.modified = %s
+            WHERE {FAILED_CONDITION}
+        """, (now,))
+        failed_count = frappe.db._cursor.rowcount
         
-        if updated_count > 0:
+        if sent_count or failed_count:
             frappe.db.commit()
-            frappe.logger().info(f"[Tracker Sync] Updated {updated_count} communications")
-        else:
+            frappe.logger().info(
+                f"[Tracker Sync] Updated {sent_count} trackers to Sent, {failed_count} trackers to Failed"
+            )
+        elif not comm_count:
             frappe.logger().info("[Tracker Sync] No updates needed")
             
     except Exception as e:
         frappe.log_error(
             title="Tracker Sync Job Error",
             message=f"Error: {str(e)}\n{frappe.get_traceback()}"
-        )
\ No newline at end of file
+        )
+
+
+def _iter_pending_trackers(chunk_size=TRACKER_SYNC_CHUNK_SIZE):
+    """
+    Yield pages of trackers whose Communication needs a status change, keyset-paginated on
+    tracker name so only one page is held in memory at a time.
+    """
+    last_name = ""
+    while True:
+        trackers = frappe.db.sql(f"""
+            SELECT 
+                t.name as tracker_name,
+                t.communication,
+                IF({SENT_CONDITION}, 'Sent', 'Failed') as new_status,
+                {COMMUNICATION_SUMMARY_COLUMNS}
+            FROM `tabLead Email Tracker` t
+            INNER JOIN `tabEmail Queue` eq ON t.email_queue_status = eq.name
+            INNER JOIN `tabCommunication` c ON t.communication = c.name
+            WHERE (({SENT_CONDITION} AND c.status <> 'Sent')
+                OR ({FAILED_CONDITION} AND c.status <> 'Failed'))
+            AND t.name > %s
+            ORDER BY t.name
+            LIMIT %s
+        """, (last_name, chunk_size), as_dict=True)
+        
+        if not trackers:
+            return
+        
+        yield trackers
+        
+        if len(trackers) < chunk_size:
+            return
+        last_name = trackers[-1].tracker_name
+
+
+def _publish_tracker_updates(trackers):
+    """Push the Communication status change of each given tracker row, see publish_communication_status."""
+    for tracker in trackers:
+        new_status = tracker.new_status
+        publish_communication_status(tracker, new_status)
+        frappe.logger().info(f"[Tracker Sync] Updated Communication {tracker.communication} to {new_status}")
+
+
+def process_tracker_sync_events():
+    """
+    Drain Tracker Sync Events written by the Email Queue DB trigger: publish UI updates
+    for just the trackers the trigger changed, then mark the events processed.
+    Batches are committed one at a time until no unprocessed events remain.
+    """
+    total = 0
+    while True:
+        events = frappe.db.sql(f"""
+            SELECT
+                e.name as event_name,
+                t.name as tracker_name,
+                t.communication,
+                c.status as new_status,
+                {COMMUNICATION_SUMMARY_COLUMNS}
+            FROM `tabTracker Sync Event` e
+            LEFT JOIN `tabLead Email Tracker` t ON t.name = e.tracker
+            LEFT JOIN `tabCommunication` c ON c.name = t.communication
+            WHERE e.processed = 0
+            ORDER BY e.creation
+            LIMIT %s
+        """, (TRACKER_SYNC_EVENT_BATCH_SIZE,), as_dict=True)
+        
+        if not events:
+            break
+        
+        _publish_tracker_updates([e for e in events if e.communication and e.new_status])
+        
+        frappe.db.sql("""
+            UPDATE `tabTracker Sync Event`
+            SET processed = 1, modified = %s
+            WHERE name IN %s
+        """, (now_datetime(), tuple(e.event_name for e in events)))
+        frappe.db.commit()
+        total += len(events)
+        
+        if len(events) < TRACKER_SYNC_EVENT_BATCH_SIZE:
+            break
+    
+    if total:
+        frappe.logger().info(f"[Tracker Sync] Processed {total} trigger events")
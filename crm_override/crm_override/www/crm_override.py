@@ -4,20 +4,32 @@ This module initializes the CRM Override app
 import frappe
 from frappe import _
 import json
+from werkzeug.wrappers import Response
+
+CRM_OVERRIDE_CONFIG = {
+    'enabled': True,
+    'version': '1.0.0'
+}
+
+# get_config response body, serialized once per process in the shape frappe.call expects
+_CONFIG_RESPONSE_BODY = json.dumps({'message': CRM_OVERRIDE_CONFIG})
+
+# Seconds browsers and proxies may reuse the get_config response. Only GET responses are cached,
+# so callers must use frappe.call({..., type: "GET"}); frappe.call's default POST always hits the server.
+CONFIG_MAX_AGE = 3600
 
 def get_context_for_dev():
     """Add CRM Override to the context for dev environment"""
     return {
-        'crm_override_config': {
-            'enabled': True,
-            'version': '1.0.0'
-        }
+        'crm_override_config': dict(CRM_OVERRIDE_CONFIG)
     }
 
 @frappe.whitelist(allow_guest=True)
 def get_config():
-    """Get CRM Override configuration"""
-    return {
-        'enabled': True,
-        'version': '1.0.0'
-    }
\ No newline at end of file
+    """
+    Get CRM Override configuration.
+    Cacheable for CONFIG_MAX_AGE when fetched with GET; POST requests still work but are never cached.
+    """
+    response = Response(_CONFIG_RESPONSE_BODY, mimetype='application/json')
+    response.headers['Cache-Control'] = f'public, max-age={CONFIG_MAX_AGE}'
+    return response
@@ -151,6 +151,9 @@ scheduler_events = {
         "crm_override.crm_override.email_queue_hooks.sync_email_queue_to_tracker"
     ],
     "cron": {
+        "* * * * *": [
+            "crm_override.crm_override.email_tracker.process_pending_opens"
+        ],
         "*/5 * * * *": [
             "crm_override.crm_override.tracker_sync.sync_email_tracker_status",
             "crm_override.crm_override.email_tracker.sync_opens_from_sendgrid"
@@ -164,6 +167,9 @@ doc_events = {
         "after_insert": "crm_override.crm_override.email_queue_hooks.on_email_queue_after_insert",
         "before_save": "crm_override.crm_override.email_queue_hooks.on_email_queue_before_save",
         "on_submit": "crm_override.crm_override.email_queue_hooks.on_email_queue_on_submit",
+    },
+    "Email Account": {
+        "on_update": "crm_override.crm_override.email_tracker.clear_sendgrid_api_key_cache",
     }
 }
 
@@ -212,6 +218,9 @@ override_whitelisted_methods = {
 
 # ignore_links_on_delete = ["Communication", "ToDo"]
 
+# Trigger-written sync events are kept for 7 days and must not block deleting their tracker
+ignore_links_on_delete = ["Tracker Sync Event"]
+
 # Request Events
 # ----------------
 # before_request = ["crm_override.utils.before_request"]
@@ -256,7 +265,7 @@ override_whitelisted_methods = {
 # Automatically update python controller files with type annotations for this app.
 # export_python_type_annotations = True
 
-# default_log_clearing_doctypes = {
-# 	"Logging DocType Name": 30  # days to retain logs
-# }
+default_log_clearing_doctypes = {
+	"Tracker Sync Event": 7  # days to retain logs
+}
 
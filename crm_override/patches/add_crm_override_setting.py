@@ -2,8 +2,8 @@ import frappe
 
 def execute():
     """Add CRM Override to CRM app configuration"""
-    app_config = frappe.get_single('CRM Settings')
-    if not hasattr(app_config, 'enable_crm_override'):
+    # CRM Settings is a Single doctype (no table column), so check for the Custom Field itself
+    if not frappe.db.exists("Custom Field", {"dt": "CRM Settings", "fieldname": "enable_crm_override"}):
         frappe.get_doc({
             'doctype': 'Custom Field',
             'dt': 'CRM Settings',
@@ -13,5 +13,3 @@ def execute():
             'insert_after': 'enable_lead_custom_fields',
             'default': '1'
         }).insert()
-        
-    frappe.db.commit()
\ No newline at end of file
@@ -0,0 +1,10 @@
+import frappe
+
+def execute():
+    """Add indexes for the tracker, DB trigger, pixel and SendGrid webhook lookups"""
+    # Composite index also serves email_queue_status-only lookups as its leftmost prefix
+    frappe.db.add_index("Lead Email Tracker", ["email_queue_status", "status"], "idx_let_queue_status")
+    frappe.db.add_index("Lead Email Tracker", ["communication"], "idx_let_communication")
+    frappe.db.add_index("Email Queue", ["message_id(140)"])
+    frappe.db.add_index("Email Queue", ["reference_doctype", "creation"], "idx_reference_doctype_creation")
+    frappe.db.add_index("Email Queue Recipient", ["recipient", "parent"], "idx_recipient_parent")
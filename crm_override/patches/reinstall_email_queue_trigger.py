@@ -0,0 +1,15 @@
+import frappe
+
+from crm_override.crm_override.setup_db_trigger import (
+    TRIGGER_INSTALLED_CACHE_KEY,
+    is_trigger_installed,
+    setup_email_queue_trigger,
+)
+
+
+def execute():
+    """Recreate the Email Queue trigger on sites that already have it, picking up its current body"""
+    # Read the trigger state from the database, not a cached flag from before the migration
+    frappe.cache().delete_value(TRIGGER_INSTALLED_CACHE_KEY)
+    if is_trigger_installed():
+        setup_email_queue_trigger()